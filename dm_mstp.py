@@ -1,101 +1,306 @@
+import heapq
+import logging
+from itertools import chain
+
 import numpy as np
 from decorators import measure_time, handle_errors
 
+try:
+    from jit_kernels import column_minima, dm_mstp_core
+except ImportError:  # Numba is not installed; the NumPy implementation below is used instead
+    column_minima = dm_mstp_core = None
+
+logger = logging.getLogger(__name__)
+
 
 class DMMSTP:
-    def __init__(self, graph_data):
+    # Graphs filling less than this fraction of the NxN matrix are stored as CSC arrays instead
+    SPARSE_DENSITY = 0.01
+    # Graphs with more nodes than this are always stored as CSC arrays and run() uses Prim's algorithm
+    PRIM_THRESHOLD = 10000
+
+    def __init__(self, graph_data=None, rows=None, cols=None, weights=None, n_nodes=None, nodes=None):
+        """
+        Initialize the DMMSTP class with the graph data, given either as a dictionary or as edge arrays.
+
+        Parameters:
+        graph_data (dict): A dictionary where the keys are node IDs and the values are dictionaries
+                           with neighboring node IDs and edge weights.
+        rows, cols, weights, n_nodes, nodes: Edge arrays, used when graph_data is None; see from_edges.
+        The graph data is not kept once the adjacency data has been built.
+        """
+        if graph_data is not None:
+            nodes, rows, cols, weights = self._flatten_distance_edges(graph_data)
+            n_nodes = len(nodes)
+        else:
+            rows, cols = np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32)
+            weights = np.asarray(weights)
+        n = self.n_nodes = int(n_nodes)
+        rows, cols, weights = self._normalize_edges(rows, cols, weights, n)
+
+        # Node names by index. A range (None stands for the indices themselves) is kept as is and mapped
+        # arithmetically, so a parsed DIMACS graph never holds a Python object per node. Other names are
+        # kept in an object array, which keeps the IDs exactly as given, where np.array would coerce a mix
+        # of ints and strings to strings.
+        if nodes is None:
+            nodes = range(n)
+        self.nodes = nodes if isinstance(nodes, range) else np.fromiter(nodes, dtype=object, count=n)
+
+        # Marked rows and columns are flagged here instead of being tracked in sets
+        self.row_alive = np.ones(n, dtype=bool)
+        self.col_alive = np.ones(n, dtype=bool)
+
+        # Both triangles are stored, so a sparse graph is kept in CSC form when that beats n * n cells
+        self.sparse = n > self.PRIM_THRESHOLD or 2 * len(weights) < self.SPARSE_DENSITY * n * n
+        if self.sparse:
+            self.indptr, self.indices, self.data = self._initialize_csc(rows, cols, weights, n)
+        else:
+            self.matrix = self._initialize_matrix(rows, cols, weights, n)
+
+        self.min_columns, self.argmin_columns = self._initialize_min_columns()
+
+        # A spanning tree has n - 1 edges, so the path is allocated up front and filled in order
+        self.mst_path = np.empty(max(n - 1, 0), dtype=[('i', np.int32), ('j', np.int32), ('w', weights.dtype)])
+        self._k = 0
+
+    @classmethod
+    def from_edges(cls, rows, cols, weights, n_nodes, nodes=None):
+        """
+        Create a DMMSTP instance from edge arrays, such as those returned by GraphParser.
+
+        Parameters:
+        rows (array-like): 0-based index of the first node of every edge.
+        cols (array-like): 0-based index of the second node of every edge.
+        weights (array-like): Weight of every edge.
+        n_nodes (int): Number of nodes; nodes without edges are included.
+        nodes (sequence): Optional node ID at every index, used in the output. Defaults to the indices.
+
+        Returns:
+        DMMSTP: The instance, ready to run.
+        """
+        return cls(rows=rows, cols=cols, weights=weights, n_nodes=n_nodes, nodes=nodes)
+
+    def _normalize_edges(self, rows, cols, weights, n):
         """
-        Initialize the DMMSTP class with the graph data.
+        Pick the storage dtype of the weights and merge edges listed in both directions.
 
         Parameters:
-        graph_data (dict): A dictionary with 'distance_edges' and optional 'travel_time_edges' as keys.
-                           Each value is a dictionary where the keys are node IDs and the values are
-                           dictionaries with neighboring node IDs and edge weights.
+        rows (np.ndarray): Row index of every edge.
+        cols (np.ndarray): Column index of every edge.
+        weights (np.ndarray): Weight of every edge, as given.
+        n (int): Number of nodes.
+
+        Returns:
+        np.ndarray: Row index of every remaining edge.
+        np.ndarray: Column index of every remaining edge.
+        np.ndarray: Weight of every remaining edge, in the storage dtype.
         """
-        self.graph_data = graph_data
+        # Integer weights are stored as int32 when they fit and as int64 otherwise, so they stay exact;
+        # only integers beyond int64 (an object array) fall back to float64. Float weights are stored as
+        # float32 unless that would overflow, or round an integral weight beyond 2 ** 24 (where float32
+        # stops holding integers exactly, as in a mix of large ints and floats); those fall back to float64.
+        # The largest representable value of the dtype stands in for infinity, so no weight may reach it.
+        if np.issubdtype(weights.dtype, np.integer) or weights.dtype == object:
+            dtype = np.float64
+            low, high = (weights.min(), weights.max()) if len(weights) else (0, 0)
+            for int_dtype in (np.int32, np.int64):
+                int_max = np.iinfo(int_dtype).max
+                if -int_max < low and high < int_max:
+                    dtype = int_dtype
+                    break
+        else:
+            dtype = np.float32
+            magnitude = np.abs(weights)
+            if len(weights) and (magnitude.max() >= np.finfo(np.float32).max or (
+                    (magnitude > 2 ** 24) & (weights == np.floor(weights))).any()):
+                dtype = np.float64
+        self._INF = np.iinfo(dtype).max if np.issubdtype(dtype, np.integer) else np.finfo(dtype).max
+        weights = weights.astype(dtype, copy=False)
+
+        # NaN and inf would break the comparisons behind Min-Columns (and the fastmath JIT reduction)
+        if np.issubdtype(dtype, np.floating) and not np.isfinite(weights).all():
+            raise ValueError("Edge weights must be finite numbers")
 
-        self.marked_rows = set()
-        self.marked_columns = set()
+        # An edge given in both directions keeps the weight listed last, so the matrix stays symmetric
+        keys = np.minimum(rows, cols).astype(np.int64) * n + np.maximum(rows, cols)
+        _, first_reversed = np.unique(keys[::-1], return_index=True)
+        last = len(weights) - 1 - first_reversed
+        rows, cols, weights = rows[last], cols[last], weights[last]
 
-        self.matrix, self.node_indices = self._initialize_matrix(graph_data)
-        self.min_columns = self._initialize_min_columns(self.matrix)
-        self.mst_path = []
+        return rows, cols, weights
 
-    def _initialize_matrix(self, distance_edges):
+    def _flatten_distance_edges(self, distance_edges):
         """
-        Convert the input graph data into an adjacency matrix.
+        Index the nodes of a dictionary-of-dictionaries graph and flatten its edges.
 
         Parameters: distance_edges (dict): A dictionary with node IDs as keys and dictionaries of neighboring nodes
         with weights as values.
 
         Returns:
-        np.ndarray: Adjacency matrix representing the graph.
-        dict: Mapping from nodes to indices.
+        dict: The node IDs as keys, in index order.
+        np.ndarray: Row index of every edge.
+        np.ndarray: Column index of every edge.
+        np.ndarray: Weight of every edge.
         """
-        nodes = set()
-        for node, neighbors in distance_edges.items():
-            nodes.add(node)
-            nodes.update(neighbors.keys())
-
-        node_indices = {node: index for index, node in enumerate(nodes)}
-        n = len(nodes)
+        # Insertion-ordered node collection, so indices are reproducible and follow the input order:
+        # the source nodes first, then any node only reached as a neighbor
+        nodes = dict.fromkeys(chain(distance_edges, chain.from_iterable(distance_edges.values())))
 
-        # Initialize adjacency matrix with infinity (or a large value)
-        matrix = np.full((n, n), np.inf)
+        node_indices = dict(zip(nodes, range(len(nodes))))
 
-        # Fill in the adjacency matrix with given edge weights
+        # Flatten the edges into (row, column, weight) triples in a single pass
+        rows, cols, weights = [], [], []
         for node1, neighbors in distance_edges.items():
             i = node_indices[node1]
             for node2, weight in neighbors.items():
-                j = node_indices[node2]
-                matrix[i][j] = weight
-                matrix[j][i] = weight
+                rows.append(i)
+                cols.append(node_indices[node2])
+                weights.append(weight)
+
+        num_edges = len(weights)
+        rows = np.fromiter(rows, dtype=np.int32, count=num_edges)
+        cols = np.fromiter(cols, dtype=np.int32, count=num_edges)
+
+        return nodes, rows, cols, np.array(weights)
+
+    def _initialize_matrix(self, rows, cols, weights, n):
+        """
+        Convert the flattened edges into an adjacency matrix.
+
+        Parameters:
+        rows (np.ndarray): Row index of every edge.
+        cols (np.ndarray): Column index of every edge.
+        weights (np.ndarray): Weight of every edge.
+        n (int): Number of nodes.
+
+        Returns:
+        np.ndarray: Adjacency matrix representing the graph.
+        """
+        # Initialize adjacency matrix with the infinity sentinel. The matrix is symmetric, so every
+        # column scan reads the matching row instead, which C order keeps contiguous.
+        matrix = np.full((n, n), self._INF, dtype=weights.dtype, order='C')
+
+        # Fill in the adjacency matrix with given edge weights
+        matrix[rows, cols] = weights
+        matrix[cols, rows] = weights
 
-        return matrix, node_indices
+        return matrix
 
-    def _initialize_min_columns(self, matrix):
+    def _initialize_csc(self, rows, cols, weights, n):
         """
-        Initialize Min-Columns with the minimum value of each unmarked column.
+        Convert the flattened edges into the compressed sparse column (CSC) form of the adjacency matrix.
 
         Parameters:
-        matrix (np.ndarray): The adjacency matrix.
+        rows (np.ndarray): Row index of every edge.
+        cols (np.ndarray): Column index of every edge.
+        weights (np.ndarray): Weight of every edge.
+        n (int): Number of nodes.
+
+        Returns:
+        np.ndarray: Offsets of every column into the two arrays below (length n + 1).
+        np.ndarray: Row index of every stored entry.
+        np.ndarray: Weight of every stored entry.
+        """
+        # Symmetrize; a self-loop is mirrored onto itself and deduplicated below
+        rows, cols = np.concatenate((rows, cols)), np.concatenate((cols, rows))
+        weights = np.concatenate((weights, weights))
+
+        # Sort by column, then by row
+        order = np.lexsort((rows, cols))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+
+        unique = np.ones(len(rows), dtype=bool)
+        unique[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, weights = rows[unique], cols[unique], weights[unique]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n), out=indptr[1:])
+
+        return indptr, rows, weights
+
+    def _initialize_min_columns(self):
+        """
+        Initialize Min-Columns with the minimum value of each column and the row it lies in.
 
         Returns:
-        list: A list of minimum values for each unmarked column.
+        np.ndarray: The minimum value of each column.
+        np.ndarray: The row index of the minimum value of each column.
         """
-        min_columns = []
-        for col in range(matrix.shape[1]):
-            if col not in self.marked_columns:
-                # Calculate minimum value in the column ignoring marked rows
-                col_min = np.min(matrix[:, col])
-                min_columns.append(col_min)
-            else:
-                min_columns.append(np.inf)  # Marked columns are ignored
-        return min_columns
+        if self.sparse:
+            return self._sparse_column_minima(np.arange(self.n_nodes))
 
-    def _update_min_columns(self):
+        if column_minima is not None:
+            n = self.matrix.shape[0]
+            min_columns = np.empty(n, dtype=self.matrix.dtype)
+            argmin_columns = np.empty(n, dtype=np.intp)
+            column_minima(self.matrix, min_columns, argmin_columns)
+            return min_columns, argmin_columns
+
+        # np.argmin rejects the empty rows of an empty graph
+        if not len(self.matrix):
+            return np.empty(0, dtype=self.matrix.dtype), np.empty(0, dtype=np.intp)
+
+        # The matrix is symmetric, so every column is reduced as the matching (contiguous) row.
+        # np.argmin along axis 0 of a C-ordered array would first copy it into transposed order.
+        # Every element is read exactly once in a streaming pass, so blocking the sweep into cache-sized
+        # row tiles does not help (measured equal or slower at n=10000).
+        argmin_columns = np.argmin(self.matrix, axis=1)
+        min_columns = self.matrix[np.arange(self.matrix.shape[0]), argmin_columns]
+        return min_columns, argmin_columns
+
+    def _sparse_column_minima(self, columns):
         """
-        Update Min-Columns after marking and dropping elements.
+        Find the minimum of the given CSC columns over the unmarked rows.
+
+        Parameters:
+        columns (np.ndarray): Indices of the columns to scan.
 
         Returns:
-        list: Updated list of minimum values for each unmarked column.
+        np.ndarray: The minimum value of each column, or the infinity sentinel if it has no unmarked entry.
+        np.ndarray: The row index of the minimum value of each column (0 when the minimum is the sentinel).
         """
-        return self._initialize_min_columns(self.matrix)
+        starts = self.indptr[columns]
+        lengths = self.indptr[columns + 1] - starts
+
+        # Gather the stored entries of the requested columns back to back
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+        values = np.where(self.row_alive[self.indices[positions]], self.data[positions], self._INF)
+
+        min_columns = np.full(len(columns), self._INF, dtype=self.data.dtype)
+        argmin_columns = np.zeros(len(columns), dtype=np.intp)
+
+        filled = lengths > 0
+        if filled.any():
+            min_columns[filled] = np.minimum.reduceat(values, offsets[filled])
+
+            # Rows are sorted within a column, so the first hit is the lowest row, matching np.argmin
+            hits = np.flatnonzero(values == np.repeat(min_columns, lengths))
+            segments = np.repeat(np.arange(len(columns)), lengths)[hits]
+            first = np.ones(len(hits), dtype=bool)
+            first[1:] = segments[1:] != segments[:-1]
+            argmin_columns[segments[first]] = self.indices[positions[hits[first]]]
+            argmin_columns[min_columns == self._INF] = 0
+
+        return min_columns, argmin_columns
 
     def _select_edge(self):
         """
         Find the highest value in Min-Columns and select the corresponding edge.
 
         Returns:
-        tuple: The selected edge as a tuple (i, j, weight).
+        tuple: The selected edge as a tuple (i, j, weight), or None if no unmarked column has a finite minimum.
         """
-        max_value = max(self.min_columns)
-        column_index = self.min_columns.index(max_value)
+        # Marked columns, and columns with no finite entry left, are masked out of the selection
+        candidates = np.where(self.col_alive & (self.min_columns != self._INF), self.min_columns, -self._INF)
+        column_index = int(np.argmax(candidates))
+        if candidates[column_index] == -self._INF:
+            return None
 
-        # Find the corresponding row index in the original matrix
-        row_index = np.argmin(self.matrix[:, column_index])
+        # The row holding the column minimum is already cached
+        row_index = int(self.argmin_columns[column_index])
 
-        return row_index, column_index, self.matrix[row_index][column_index]
+        return row_index, column_index, self.min_columns[column_index]
 
     def _mark_and_drop(self, selected_edge):
         """
@@ -107,22 +312,102 @@ class DMMSTP:
         i, j, _ = selected_edge
 
         # Mark the selected row and column
-        self.marked_rows.add(i)
-        self.marked_columns.add(j)
+        self.row_alive[i] = False
+        self.col_alive[j] = False
+
+        # Only the unmarked columns whose minimum lay in the dropped row need a rescan
+        dirty = np.flatnonzero((self.argmin_columns == i) & self.col_alive)
+
+        # The adjacency data is never written; the reductions skip marked rows instead
+        if self.sparse:
+            self.min_columns[dirty], self.argmin_columns[dirty] = self._sparse_column_minima(dirty)
+        else:
+            alive_rows = np.flatnonzero(self.row_alive)
+            self.argmin_columns[dirty] = alive_rows[np.argmin(self.matrix[np.ix_(dirty, alive_rows)], axis=1)]
+            self.min_columns[dirty] = self.matrix[dirty, self.argmin_columns[dirty]]
+
+            # Columns with no unmarked entry left point at row 0, as in the sparse reduction
+            self.argmin_columns[dirty[self.min_columns[dirty] == self._INF]] = 0
+
+    def _neighbors(self, node):
+        """
+        List the neighbors of a node with the weights of the connecting edges.
+
+        Parameters:
+        node (int): Index of the node.
+
+        Returns:
+        list: Indices of the neighboring nodes.
+        list: Weights of the edges to those nodes.
+        """
+        if self.sparse:
+            # The CSC arrays hold a symmetric matrix, so column `node` lists its neighbors
+            start, end = self.indptr[node], self.indptr[node + 1]
+            return self.indices[start:end].tolist(), self.data[start:end].tolist()
+
+        neighbors = np.flatnonzero(self.matrix[node] != self._INF)
+        return neighbors.tolist(), self.matrix[node, neighbors].tolist()
+
+    def _prim(self):
+        """
+        Build the MST path with Prim's algorithm on a binary heap, in O(E log n).
+
+        A disconnected graph yields a minimum spanning forest: a new tree is started from the first
+        unvisited node whenever the heap runs dry.
+        """
+        n = self.n_nodes
+        visited = np.zeros(n, dtype=bool)
+
+        # Prim does not use the marks, so it can rebuild the path from scratch after any earlier run
+        self._k = 0
+
+        for root in range(n):
+            if visited[root]:
+                continue
+
+            heap = [(0, root, root)]
+            while heap:
+                weight, i, j = heapq.heappop(heap)
+                if visited[j]:
+                    continue
+
+                visited[j] = True
+                if i != j:
+                    self.mst_path[self._k] = (i, j, weight)
+                    self._k += 1
+
+                for neighbor, neighbor_weight in zip(*self._neighbors(j)):
+                    if not visited[neighbor]:
+                        heapq.heappush(heap, (neighbor_weight, j, neighbor))
 
-        # Drop (set to infinity) all elements in the marked row and column
-        self.matrix[i, :] = np.inf
-        self.matrix[:, j] = np.inf
+    def _node_names(self, indices):
+        """
+        Map node indices back to the original node names.
+
+        Parameters:
+        indices (np.ndarray): Node indices.
+
+        Returns:
+        np.ndarray: The name of every node.
+        """
+        if isinstance(self.nodes, range):
+            return self.nodes.start + self.nodes.step * indices.astype(np.int64)
+        return self.nodes[indices]
 
     def _generate_mst_output(self):
         """
         Prepare the MST path for output.
 
         Returns:
-        list: MST represented by the original node names.
+        dict: MST as parallel 'src', 'dst' and 'weight' arrays, with the original node names.
         """
-        inverse_node_indices = {v: k for k, v in self.node_indices.items()}
-        mst_output = [(inverse_node_indices[i], inverse_node_indices[j], weight) for i, j, weight in self.mst_path]
+        if self._k < len(self.mst_path):
+            logger.warning(f"Only {self._k} of {len(self.mst_path)} MST edges were found: the remaining nodes "
+                           f"cannot be reached through finite edges. Returning the partial path.")
+
+        mst_path = self.mst_path[:self._k]
+        mst_output = {'src': self._node_names(mst_path['i']), 'dst': self._node_names(mst_path['j']),
+                      'weight': mst_path['w'].copy()}
         return mst_output
 
     @measure_time
@@ -130,15 +415,43 @@ class DMMSTP:
     def run(self):
         """
         Execute the DM-MSTP algorithm to find the Minimum Spanning Tree (MST).
+        Graphs with more than PRIM_THRESHOLD nodes are handed to Prim's algorithm instead.
 
         Returns:
-        list: The edges that make up the MST.
+        dict: The edges that make up the MST, as parallel 'src', 'dst' and 'weight' arrays.
         """
-        for _ in range(len(self.node_indices) - 1):
+        if self.n_nodes > self.PRIM_THRESHOLD:
+            self._prim()
+            return self._generate_mst_output()
+
+        if dm_mstp_core is not None and not self.sparse:
+            rows, cols, weights = dm_mstp_core(self.matrix, self.min_columns, self.argmin_columns,
+                                               self.row_alive, self.col_alive, self._INF)
+            edges = self.mst_path[self._k:self._k + len(rows)]
+            edges['i'], edges['j'], edges['w'] = rows, cols, weights
+            self._k += len(rows)
+            return self._generate_mst_output()
+
+        for _ in range(self.n_nodes - 1):
             selected_edge = self._select_edge()
-            self.mst_path.append(selected_edge)
+            if selected_edge is None:
+                break
+
+            self.mst_path[self._k] = selected_edge
+            self._k += 1
 
             self._mark_and_drop(selected_edge)
-            self.min_columns = self._update_min_columns()
 
         return self._generate_mst_output()
+
+    @measure_time
+    @handle_errors
+    def run_prim(self):
+        """
+        Find the Minimum Spanning Tree (MST) with Prim's algorithm instead of DM-MSTP.
+
+        Returns:
+        dict: The edges that make up the MST, as parallel 'src', 'dst' and 'weight' arrays.
+        """
+        self._prim()
+        return self._generate_mst_output()
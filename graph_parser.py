@@ -1,5 +1,8 @@
 import os
 import gzip
+from array import array
+
+import numpy as np
 
 from decorators import measure_time
 
@@ -51,19 +54,27 @@ class GraphParser:
         return graph
 
     def parse_graph_from_file(self, file_path):
-        graph = {}
+        # Arcs are streamed into typed buffers, so no per-edge Python objects are kept around.
+        # Node IDs are 1-based in the file and 0-based indices in the returned arrays.
+        n_nodes = 0
+        rows, cols, weights = array('i'), array('i'), array('q')
         with gzip.open(file_path, 'rt') as f:
             for line in f:
                 if line.startswith('a'):
                     parts = line.split()
-                    node_u = int(parts[1])
-                    node_v = int(parts[2])
-                    weight = int(parts[3])
-                    if node_u not in graph:
-                        graph[node_u] = {}
-                    graph[node_u][node_v] = weight
+                    rows.append(int(parts[1]) - 1)
+                    cols.append(int(parts[2]) - 1)
+                    weights.append(int(parts[3]))
+                elif line.startswith('p'):
+                    n_nodes = int(line.split()[2])
 
-        return graph
+        rows = np.frombuffer(rows, dtype=np.intc)
+        cols = np.frombuffer(cols, dtype=np.intc)
+        weights = np.frombuffer(weights, dtype=np.int64)
+        if len(rows):
+            n_nodes = max(n_nodes, int(rows.max()) + 1, int(cols.max()) + 1)
+
+        return {'rows': rows, 'cols': cols, 'weights': weights, 'n_nodes': n_nodes, 'nodes': range(1, n_nodes + 1)}
 
     def combine_graphs(self, coordinate_graph, distance_graph, travel_time_graph):
         combined_graph = {'coordinates': coordinate_graph, 'distance_edges': distance_graph,
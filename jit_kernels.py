@@ -0,0 +1,112 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(fastmath=True, cache=True)
+def row_minimum(row):
+    """
+    Return the smallest value of a row.
+
+    The reduction is compiled with fastmath so LLVM can turn it into packed min instructions; without it,
+    float comparisons must keep their NaN semantics and stay scalar. The matrix holds no NaN or inf
+    (DMMSTP rejects non-finite weights and missing edges use a finite sentinel), so the relaxed semantics do
+    not change the result.
+
+    Parameters:
+    row (np.ndarray): A contiguous row of the adjacency matrix.
+
+    Returns:
+    The minimum value of the row.
+    """
+    return row.min()
+
+
+@njit(parallel=True, cache=True)
+def column_minima(matrix, min_columns, argmin_columns):
+    """
+    Compute the minimum of every column and the first row holding it, one column per thread.
+
+    Parameters:
+    matrix (np.ndarray): The symmetric, C-ordered adjacency matrix; column j is read as row j.
+    min_columns (np.ndarray): Output array for the minimum value of each column.
+    argmin_columns (np.ndarray): Output array for the row index of the minimum value of each column.
+    """
+    n = matrix.shape[0]
+    for col in prange(n):
+        # The plain minimum vectorizes; tracking the row inside it does not and measured ~40% slower.
+        # The second pass stops at the first hit and reads a row that is still in cache.
+        # The reduction lives in its own function: fastmath on a parallel kernel does not reach its loop body.
+        value = row_minimum(matrix[col])
+        min_columns[col] = value
+
+        # Bounded, so a NaN weight (which never compares equal to the minimum) cannot run past the row
+        best = 0
+        while best < n - 1 and matrix[col, best] != value:
+            best += 1
+        argmin_columns[col] = best
+
+
+@njit(cache=True)
+def dm_mstp_core(matrix, min_columns, argmin_columns, row_alive, col_alive, inf):
+    """
+    Run the DM-MSTP selection loop on a dense adjacency matrix.
+
+    Min-Columns and the marks are updated in place, exactly as DMMSTP does step by step. The matrix is only read.
+
+    Parameters:
+    matrix (np.ndarray): The symmetric, C-ordered adjacency matrix, with the infinity sentinel for missing edges.
+    min_columns (np.ndarray): The minimum value of each column.
+    argmin_columns (np.ndarray): The row index of the minimum value of each column.
+    row_alive (np.ndarray): False for every marked row.
+    col_alive (np.ndarray): False for every marked column.
+    inf: The infinity sentinel of the matrix dtype.
+
+    Returns:
+    np.ndarray: Row index of every selected edge.
+    np.ndarray: Column index of every selected edge.
+    np.ndarray: Weight of every selected edge.
+    The arrays are shorter than n - 1 when the loop runs out of finite edges.
+    """
+    n = matrix.shape[0]
+    # An empty graph has no edges to select (and n - 1 would be a negative size)
+    size = max(n - 1, 0)
+    rows = np.empty(size, dtype=np.int64)
+    cols = np.empty(size, dtype=np.int64)
+    weights = np.empty(size, dtype=matrix.dtype)
+
+    count = 0
+    for k in range(n - 1):
+        # Highest finite Min-Column among the unmarked columns; the first one wins ties, like np.argmax
+        j = -1
+        for col in range(n):
+            if col_alive[col] and min_columns[col] != inf and (j < 0 or min_columns[col] > min_columns[j]):
+                j = col
+
+        # No unmarked column has a finite entry left: no further edge can be selected
+        if j < 0:
+            break
+        i = argmin_columns[j]
+
+        rows[k] = i
+        cols[k] = j
+        weights[k] = min_columns[j]
+        count += 1
+
+        row_alive[i] = False
+        col_alive[j] = False
+
+        # Rescan the unmarked columns whose minimum lay in the dropped row, over the unmarked rows only.
+        # The matrix is symmetric, so each column is walked as the matching contiguous row.
+        # A column with no finite entry left points at row 0, as in DMMSTP.
+        for col in range(n):
+            if col_alive[col] and argmin_columns[col] == i:
+                best = 0
+                value = inf
+                for row in range(n):
+                    if row_alive[row] and matrix[col, row] < value:
+                        best = row
+                        value = matrix[col, row]
+                argmin_columns[col] = best
+                min_columns[col] = value
+
+    return rows[:count], cols[:count], weights[:count]
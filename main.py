@@ -14,18 +14,20 @@ def get_user_input_for_graph():
     elif input_type == '2':
         num_nodes = int(input("Enter number of nodes for the sample graph: "))
         num_edges = int(input("Enter number of edges for the sample graph: "))
-        print(generate_graph(num_nodes, num_edges))
-        return generate_graph(num_nodes, num_edges)
+        graph_data = generate_graph(num_nodes, num_edges)
+        print(graph_data)
+        return DMMSTP(graph_data)
     elif input_type == '3':
-        return get_manual_graph_input()
+        return DMMSTP(get_manual_graph_input())
     else:
         print("Invalid option")
         return get_user_input_for_graph()
 
 
 def load_graph_from_file(folder_path):
+    # The parser returns edge arrays rather than a dictionary of neighbors
     parser = GraphParser()
-    return parser.parse(folder_path)
+    return DMMSTP.from_edges(**parser.parse(folder_path)['distance_edges'])
 
 
 def get_manual_graph_input():
@@ -41,11 +43,10 @@ def get_manual_graph_input():
             weight = int(input("Enter edge weight: "))
             neighbors[neighbor] = weight
         graph_data[node] = neighbors
-    return {'distance_edges': graph_data}
+    return graph_data
 
 
-def run_dm_mstp(graph_data):
-    dm_mstp = DMMSTP(graph_data)
+def run_dm_mstp(dm_mstp):
     return dm_mstp.run()
 
 
@@ -63,25 +64,25 @@ def main():
     # If no argument provided, ask the user interactively
     if not any(vars(args).values()):
         print("No input provided. Switching to interactive mode.")
-        graph_data = get_user_input_for_graph()
+        dm_mstp = get_user_input_for_graph()
     else:
         # If file argument is provided
         if args.file:
-            graphs_data = load_graph_from_file(args.file)
-            graph_data = graphs_data['distance_edges']
+            dm_mstp = load_graph_from_file(args.file)
         # If sample graph option is chosen
         elif args.sample:
             num_nodes = int(input("Enter number of nodes for the sample graph: "))
             num_edges = int(input("Enter number of edges for the sample graph: "))
             graph_data = generate_graph(num_nodes, num_edges)
             print("Generated Graph:", graph_data)
+            dm_mstp = DMMSTP(graph_data)
 
         # If manual input option is chosen
         elif args.manual:
-            graph_data = get_manual_graph_input()
+            dm_mstp = DMMSTP(get_manual_graph_input())
 
     # Run the DM-MSTP algorithm
-    mst_path = run_dm_mstp(graph_data)
+    mst_path = run_dm_mstp(dm_mstp)
     print("MST Path:", mst_path)
 
 
@@ -0,0 +1,317 @@
+import math
+import random
+import unittest
+from itertools import chain
+from unittest import mock
+
+import numpy as np
+
+import dm_mstp
+from dm_mstp import DMMSTP
+
+
+def random_graph(seed, n_nodes, n_edges, max_weight=3, n_isolated=0, n_self_loops=0):
+    """
+    Build a random graph in the dictionary form accepted by DMMSTP.
+
+    A small weight range makes ties common. Isolated nodes have no edges, so their columns stay empty.
+    """
+    rng = random.Random(seed)
+    graph = {node: {} for node in range(n_nodes + n_isolated)}
+    for _ in range(n_edges):
+        node1, node2 = rng.sample(range(n_nodes), 2)
+        graph[node1][node2] = rng.randint(1, max_weight)
+    for node in rng.sample(range(n_nodes), n_self_loops):
+        graph[node][node] = rng.randint(1, max_weight)
+    return graph
+
+
+def run_with_layout(graph, sparse, method='run'):
+    """
+    Run DMMSTP on the graph with the adjacency data forced into the dense or the CSC layout.
+    """
+    with mock.patch.object(DMMSTP, 'SPARSE_DENSITY', 2 if sparse else 0):
+        instance = DMMSTP(graph)
+        assert instance.sparse == sparse
+        return getattr(instance, method)()
+
+
+class TestSparseLayout(unittest.TestCase):
+    def assert_same_edges(self, graph):
+        dense = run_with_layout(graph, sparse=False)
+        sparse = run_with_layout(graph, sparse=True)
+        for key in ('src', 'dst', 'weight'):
+            np.testing.assert_array_equal(dense[key], sparse[key])
+
+    def test_matches_dense_with_ties(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                self.assert_same_edges(random_graph(seed, n_nodes=30, n_edges=120))
+
+    def test_matches_dense_with_empty_columns(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                self.assert_same_edges(random_graph(seed, n_nodes=30, n_edges=20, n_isolated=5))
+
+    def test_matches_dense_with_self_loops(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                self.assert_same_edges(random_graph(seed, n_nodes=30, n_edges=80, n_self_loops=10))
+
+    def test_matches_dense_without_numba(self):
+        with mock.patch.object(dm_mstp, 'dm_mstp_core', None), mock.patch.object(dm_mstp, 'column_minima', None):
+            for seed in range(10):
+                with self.subTest(seed=seed):
+                    self.assert_same_edges(random_graph(seed, n_nodes=30, n_edges=60, n_isolated=3, n_self_loops=5))
+
+    def test_edge_listed_in_both_directions(self):
+        graph = {'a': {'b': 5, 'c': 2}, 'b': {'a': 7}, 'c': {'b': 4}}
+        self.assert_same_edges(graph)
+
+        with mock.patch.object(DMMSTP, 'SPARSE_DENSITY', 0):
+            matrix = DMMSTP(graph).matrix
+        np.testing.assert_array_equal(matrix, matrix.T)
+
+
+def kruskal(graph):
+    """
+    Reference minimum spanning forest: total weight and number of edges, by Kruskal's algorithm.
+    """
+    # An edge listed in both directions keeps the weight listed last, as in DMMSTP
+    undirected = {frozenset((node1, node2)): (weight, node1, node2)
+                  for node1, neighbors in graph.items() for node2, weight in neighbors.items()}
+    edges = sorted(undirected.values())
+    parent = {node: node for node in graph}
+    parent.update({node: node for neighbors in graph.values() for node in neighbors})
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    total, count = 0, 0
+    for weight, node1, node2 in edges:
+        root1, root2 = find(node1), find(node2)
+        if root1 != root2:
+            parent[root1] = root2
+            total += weight
+            count += 1
+    return total, count
+
+
+def reference_dm_mstp(graph):
+    """
+    Reference DM-MSTP that recomputes every Min-Column from scratch at each step: the minimum over the
+    unmarked rows of each unmarked column, then the first column holding the highest finite minimum.
+
+    Returns the selected edges as (src, dst, weight) triples with the original node names.
+    """
+    nodes = list(dict.fromkeys(chain(graph, chain.from_iterable(graph.values()))))
+    index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+
+    matrix = [[math.inf] * n for _ in range(n)]
+    for node1, neighbors in graph.items():
+        for node2, weight in neighbors.items():
+            i, j = index[node1], index[node2]
+            matrix[i][j] = matrix[j][i] = weight
+
+    alive_rows, alive_cols = set(range(n)), set(range(n))
+    path = []
+    for _ in range(n - 1):
+        best = None
+        for col in sorted(alive_cols):
+            row = min(sorted(alive_rows), key=lambda r: matrix[r][col], default=None)
+            if row is None or matrix[row][col] == math.inf:
+                continue
+            if best is None or matrix[row][col] > matrix[best[0]][best[1]]:
+                best = (row, col)
+        if best is None:
+            break
+
+        row, col = best
+        path.append((nodes[row], nodes[col], matrix[row][col]))
+        alive_rows.discard(row)
+        alive_cols.discard(col)
+    return path
+
+
+class TestIncrementalMinColumns(unittest.TestCase):
+    def assert_matches_reference(self, graph):
+        expected = reference_dm_mstp(graph)
+        for sparse in (False, True):
+            with self.subTest(sparse=sparse):
+                mst = run_with_layout(graph, sparse)
+                self.assertEqual(list(zip(mst['src'].tolist(), mst['dst'].tolist(), mst['weight'].tolist())),
+                                 expected)
+
+    def random_graphs(self):
+        for seed in range(200):
+            yield seed, random_graph(seed, n_nodes=25, n_edges=random.Random(seed).randint(10, 150),
+                                     max_weight=5, n_isolated=seed % 3, n_self_loops=seed % 4)
+
+    def test_matches_full_recompute(self):
+        for seed, graph in self.random_graphs():
+            with self.subTest(seed=seed):
+                self.assert_matches_reference(graph)
+
+    def test_matches_full_recompute_without_numba(self):
+        with mock.patch.object(dm_mstp, 'dm_mstp_core', None), mock.patch.object(dm_mstp, 'column_minima', None):
+            for seed, graph in self.random_graphs():
+                with self.subTest(seed=seed):
+                    self.assert_matches_reference(graph)
+
+
+class TestPrim(unittest.TestCase):
+    def assert_minimum_forest(self, graph, n_edges):
+        expected_total, expected_count = kruskal(graph)
+        self.assertEqual(expected_count, n_edges)
+        for sparse in (False, True):
+            with self.subTest(sparse=sparse):
+                mst = run_with_layout(graph, sparse, method='run_prim')
+                self.assertEqual(len(mst['src']), n_edges)
+                self.assertEqual(mst['weight'].sum(), expected_total)
+
+    def test_spanning_tree(self):
+        for seed in range(20):
+            # A path through all nodes keeps the graph connected
+            graph = random_graph(seed, n_nodes=40, n_edges=150, max_weight=50, n_self_loops=5)
+            for node in range(39):
+                graph[node].setdefault(node + 1, 50)
+            with self.subTest(seed=seed):
+                self.assert_minimum_forest(graph, n_edges=39)
+
+    def test_spanning_forest(self):
+        # Two components of three nodes each, and an isolated node: 7 nodes - 3 components = 4 edges
+        graph = {'a': {'b': 4, 'c': 1}, 'b': {'c': 2}, 'x': {'y': 3, 'z': 7}, 'y': {'z': 5}, 'lone': {}}
+        self.assert_minimum_forest(graph, n_edges=4)
+
+    def test_forest_edges_stay_within_components(self):
+        graph = {'a': {'b': 4, 'c': 1}, 'b': {'c': 2}, 'x': {'y': 3, 'z': 7}, 'y': {'z': 5}, 'lone': {}}
+        for sparse in (False, True):
+            with self.subTest(sparse=sparse):
+                mst = run_with_layout(graph, sparse, method='run_prim')
+                for src, dst in zip(mst['src'], mst['dst']):
+                    self.assertEqual(src in 'abc', dst in 'abc')
+                self.assertNotIn('lone', set(mst['src']) | set(mst['dst']))
+
+    def test_run_prim_after_run(self):
+        graph = {'a': {'b': 4, 'c': 1}, 'b': {'c': 2}, 'c': {'d': 3}}
+        instance = DMMSTP(graph)
+        instance.run()
+        for _ in range(2):
+            mst = instance.run_prim()
+            self.assertEqual(len(mst['src']), 3)
+            self.assertEqual(mst['weight'].sum(), 6)
+
+    def test_run_twice_above_prim_threshold(self):
+        graph = {'a': {'b': 4, 'c': 1}, 'b': {'c': 2}, 'c': {'d': 3}}
+        with mock.patch.object(DMMSTP, 'PRIM_THRESHOLD', 2):
+            instance = DMMSTP(graph)
+            for _ in range(2):
+                mst = instance.run()
+                self.assertEqual(len(mst['src']), 3)
+                self.assertEqual(mst['weight'].sum(), 6)
+
+
+class TestPartialPath(unittest.TestCase):
+    # Two components and an isolated node. Once row 'a' is marked, column 'c' has no unmarked entry left,
+    # and column 'lone' never had one, so DM-MSTP stops two edges short of n - 1.
+    GRAPH = {'a': {'b': 4, 'c': 1}, 'x': {'y': 3}, 'lone': {}}
+
+    def assert_partial_path(self):
+        for sparse in (False, True):
+            with self.subTest(sparse=sparse):
+                with self.assertLogs('dm_mstp', 'WARNING') as logs:
+                    mst = run_with_layout(self.GRAPH, sparse)
+                self.assertIn('Only 4 of 5 MST edges were found', logs.output[0])
+
+                self.assertEqual(mst['src'].tolist(), ['a', 'y', 'x', 'c'])
+                self.assertEqual(mst['dst'].tolist(), ['b', 'x', 'y', 'a'])
+                self.assertEqual(mst['weight'].tolist(), [4, 3, 3, 1])
+
+    def test_stops_without_finite_columns(self):
+        self.assert_partial_path()
+
+    def test_stops_without_finite_columns_without_numba(self):
+        with mock.patch.object(dm_mstp, 'dm_mstp_core', None), mock.patch.object(dm_mstp, 'column_minima', None):
+            self.assert_partial_path()
+
+
+class TestFromEdges(unittest.TestCase):
+    GRAPH = {'a': {'b': 4, 'c': 1}, 'b': {'c': 2}, 'c': {'d': 3}}
+
+    def test_matches_dictionary_input(self):
+        expected = DMMSTP(self.GRAPH).run()
+        mst = DMMSTP.from_edges([0, 0, 1, 2], [1, 2, 2, 3], [4, 1, 2, 3], 4, nodes=['a', 'b', 'c', 'd']).run()
+        for key in ('src', 'dst', 'weight'):
+            np.testing.assert_array_equal(mst[key], expected[key])
+
+    def test_nodes_default_to_indices(self):
+        instance = DMMSTP.from_edges([0, 0, 1, 2], [1, 2, 2, 3], [4, 1, 2, 3], 5)
+        self.assertEqual(instance.nodes, range(5))
+
+        mst = instance.run_prim()
+        self.assertEqual(sorted(mst['src'].tolist() + mst['dst'].tolist()), [0, 1, 2, 2, 2, 3])
+
+
+class TestWeightDtype(unittest.TestCase):
+    def assert_weights(self, graph, dtype, weights):
+        instance = DMMSTP(graph)
+        self.assertEqual(instance.matrix.dtype, dtype)
+        self.assertEqual(sorted(instance.run()['weight'].tolist()), weights)
+
+    def test_small_ints_are_int32(self):
+        self.assert_weights({1: {2: 5, 3: 7}}, np.int32, [5, 7])
+
+    def test_large_ints_fall_back_to_int64(self):
+        self.assert_weights({1: {2: 3_000_000_001, 3: 3_000_000_100}}, np.int64, [3_000_000_001, 3_000_000_100])
+
+    def test_ints_beyond_int64_fall_back_to_float64(self):
+        self.assert_weights({1: {2: 10 ** 20, 3: 1}}, np.float64, [1.0, 1e20])
+
+    def test_floats_are_float32(self):
+        self.assert_weights({1: {2: 0.5, 3: 1.5}}, np.float32, [0.5, 1.5])
+
+    def test_floats_beyond_float32_fall_back_to_float64(self):
+        self.assert_weights({1: {2: 1e39, 3: 1.0}, 2: {3: 2.0}}, np.float64, [2.0, 1e39])
+
+    def test_float32_max_is_not_a_missing_edge(self):
+        float32_max = float(np.finfo(np.float32).max)
+        self.assert_weights({1: {2: float32_max, 3: 1.0}}, np.float64, [1.0, float32_max])
+
+    def test_large_ints_mixed_with_floats_stay_exact(self):
+        self.assert_weights({1: {2: 3_000_000_001, 3: 0.5}}, np.float64, [0.5, 3_000_000_001])
+
+
+class TestEmptyGraph(unittest.TestCase):
+    def assert_empty(self, mst):
+        self.assertIsNotNone(mst)
+        for key in ('src', 'dst', 'weight'):
+            self.assertEqual(len(mst[key]), 0)
+
+    def test_empty_graph(self):
+        self.assert_empty(DMMSTP({}).run())
+
+    def test_empty_graph_without_numba(self):
+        with mock.patch.object(dm_mstp, 'dm_mstp_core', None), mock.patch.object(dm_mstp, 'column_minima', None):
+            self.assert_empty(DMMSTP({}).run())
+
+
+class TestNaNWeight(unittest.TestCase):
+    def test_nan_weight_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DMMSTP({1: {2: float('nan'), 3: 1.0}, 2: {3: 2.0}})
+
+    def test_inf_weight_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DMMSTP({1: {2: float('inf'), 3: 1.0}, 2: {3: 2.0}})
+
+    def test_non_finite_edge_array_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DMMSTP.from_edges([0, 1], [1, 2], [1.0, float('-inf')], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dm_mstp import DMMSTP
+from graph_parser import GraphParser
+
+# A DIMACS graph declaring 5 nodes, of which only nodes 1 to 3 have arcs
+GRAPH_FILE = """c 9th DIMACS Implementation Challenge
+p sp 5 4
+a 1 2 7
+a 2 1 7
+a 2 3 4
+a 3 1 9
+"""
+
+
+class TestParseGraphFromFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'USA-road-d.TEST.gr.gz')
+        with gzip.open(self.file_path, 'wt') as f:
+            f.write(GRAPH_FILE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_indices_are_zero_based(self):
+        graph = GraphParser().parse_graph_from_file(self.file_path)
+        np.testing.assert_array_equal(graph['rows'], [0, 1, 1, 2])
+        np.testing.assert_array_equal(graph['cols'], [1, 0, 2, 0])
+        np.testing.assert_array_equal(graph['weights'], [7, 7, 4, 9])
+
+    def test_node_count_comes_from_problem_line(self):
+        graph = GraphParser().parse_graph_from_file(self.file_path)
+        self.assertEqual(graph['n_nodes'], 5)
+        self.assertEqual(list(graph['nodes']), [1, 2, 3, 4, 5])
+
+    def test_from_edges_names_nodes_by_file_id(self):
+        dm_mstp = DMMSTP.from_edges(**GraphParser().parse_graph_from_file(self.file_path))
+        self.assertEqual(dm_mstp.n_nodes, 5)
+        self.assertEqual(dm_mstp.nodes, range(1, 6))
+
+        mst = dm_mstp.run_prim()
+        self.assertEqual({frozenset(edge) for edge in zip(mst['src'], mst['dst'])}, {frozenset((1, 2)), frozenset((2, 3))})
+        self.assertEqual(mst['weight'].sum(), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()